@@ -1,5 +1,6 @@
 # file_inserter.py - Updated to fetch files from specific folder
-import mysql.connector
+import near_duplicates
+import storage
 import os
 import glob
 import docx
@@ -8,15 +9,11 @@ import io
 
 # Configuration
 FILES_FOLDER = r"C:\Users\dwayn\Desktop\New folder\files"
+BULK_LOAD_BATCH_SIZE = 100  # Files written per transaction in automatic mode
 
 def insert_files():
-    # Database connection configuration
-    db_config = {
-        "host": "localhost",
-        "user": "root",        # Change this if needed
-        "password": "",        # Change this if needed
-        "database": "mycorpus"   # Change this if needed
-    }
+    # Database connection configuration (see storage.py)
+    db_config = storage.DB_CONFIG
 
     print("=" * 60)
     print("ISIZULU CORPUS FILE INSERTER")
@@ -150,10 +147,15 @@ def process_files_interactively(files, db_config):
 def process_files_one_by_one(files, db_config):
     """Process each file one by one with user input"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = storage.connect(db_config)
         cursor = conn.cursor()
         print("✅ Connected to the database")
 
+        # Sign documents added since the last run so near-duplicate checks see them
+        signed = near_duplicates.backfill_signatures(conn)
+        if signed:
+            print(f"✍️  Signed {signed} existing document(s) for near-duplicate checks")
+
         processed_count = 0
         skipped_count = 0
         
@@ -223,7 +225,7 @@ def process_files_one_by_one(files, db_config):
         
         print(f"\n📊 Processing complete: {processed_count} inserted, {skipped_count} skipped")
         
-    except mysql.connector.Error as err:
+    except storage.Error as err:
         print(f"❌ Database error: {err}")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -236,56 +238,67 @@ def process_files_one_by_one(files, db_config):
 def process_files_automatically(files, db_config):
     """Process all files automatically with auto-detection"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = storage.connect(db_config)
         cursor = conn.cursor()
         print("✅ Connected to the database")
 
+        # Sign documents added since the last run so near-duplicate checks see them
+        signed = near_duplicates.backfill_signatures(conn)
+        if signed:
+            print(f"✍️  Signed {signed} existing document(s) for near-duplicate checks")
+
         processed_count = 0
         skipped_count = 0
         
-        for file_info in files:
-            try:
-                print(f"\n🔍 Processing: {file_info['filename']}")
-                
-                # Read file content
-                content = read_file_content(file_info)
-                if content is None:
-                    print("❌ Failed to read file content. Skipping...")
+        for batch_start in range(0, len(files), BULK_LOAD_BATCH_SIZE):
+            # Read the whole batch first so no write transaction is open while parsing files
+            prepared = []
+            for file_info in files[batch_start:batch_start + BULK_LOAD_BATCH_SIZE]:
+                try:
+                    print(f"\n🔍 Processing: {file_info['filename']}")
+                    
+                    # Read file content
+                    content = read_file_content(file_info)
+                    if content is None:
+                        print("❌ Failed to read file content. Skipping...")
+                        skipped_count += 1
+                        continue
+                    
+                    # Extract filename without extension for title
+                    title = os.path.splitext(file_info['filename'])[0]
+                    
+                    # Check if this document already exists
+                    check_query = "SELECT id FROM documents WHERE title = %s"
+                    cursor.execute(check_query, (title,))
+                    existing_doc = cursor.fetchone()
+                    
+                    if existing_doc:
+                        print(f"⏭️  Skipping '{title}' - already exists (ID: {existing_doc[0]})")
+                        skipped_count += 1
+                        continue
+                    
+                    # Determine genre automatically
+                    genre = determine_genre(title, content)
+                    source = "Automated Import"
+                    prepared.append((title, content, genre, source))
+                    
+                except Exception as e:
+                    print(f"❌ Error processing {file_info['filename']}: {e}")
                     skipped_count += 1
                     continue
-                
-                # Extract filename without extension for title
-                title = os.path.splitext(file_info['filename'])[0]
-                
-                # Check if this document already exists
-                check_query = "SELECT id FROM documents WHERE title = %s"
-                cursor.execute(check_query, (title,))
-                existing_doc = cursor.fetchone()
-                
-                if existing_doc:
-                    print(f"⏭️  Skipping '{title}' - already exists (ID: {existing_doc[0]})")
-                    skipped_count += 1
-                    continue
-                
-                # Determine genre automatically
-                genre = determine_genre(title, content)
-                source = "Automated Import"
-                
-                # Insert the document
-                if insert_document(cursor, conn, title, content, genre, source):
-                    processed_count += 1
-                    print(f"✅ Auto-inserted: {title} (Genre: {genre})")
-                else:
-                    skipped_count += 1
-                
-            except Exception as e:
-                print(f"❌ Error processing {file_info['filename']}: {e}")
-                skipped_count += 1
-                continue
+            
+            # Write the batch in one transaction with relaxed durability (SQLite only)
+            with storage.bulk_load(conn):
+                for title, content, genre, source in prepared:
+                    if insert_document(cursor, conn, title, content, genre, source):
+                        processed_count += 1
+                        print(f"✅ Auto-inserted: {title} (Genre: {genre})")
+                    else:
+                        skipped_count += 1
 
         print(f"\n📊 Processing complete: {processed_count} inserted, {skipped_count} skipped")
         
-    except mysql.connector.Error as err:
+    except storage.Error as err:
         print(f"❌ Database error: {err}")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -336,22 +349,30 @@ def insert_document(cursor, conn, title, content, genre, source):
             print(f"❌ Document with title '{title}' already exists")
             return False
         
+        # Check for a near-duplicate of an existing document (texts too short to sign are not checked)
+        signature = near_duplicates.compute_signature(content)
+        duplicate = signature and near_duplicates.find_duplicate(cursor, signature)
+        if duplicate:
+            print(f"❌ Document '{title}' is a near-duplicate of document ID {duplicate[0]} ({duplicate[1]:.0%} similar)")
+            return False
+        
         # Insert new document
         insert_query = """
         INSERT INTO documents (title, text, genre, source)
         VALUES (%s, %s, %s, %s)
         """
         cursor.execute(insert_query, (title, content, genre, source))
-        conn.commit()
         
         # Get the ID of the inserted document
-        cursor.execute("SELECT LAST_INSERT_ID()")
-        doc_id = cursor.fetchone()[0]
+        doc_id = cursor.lastrowid
+        
+        near_duplicates.store_signature(cursor, doc_id, signature)
+        conn.commit()
         print(f"📄 Inserted document ID: {doc_id}")
         
         return True
         
-    except mysql.connector.Error as err:
+    except storage.Error as err:
         print(f"❌ Database error: {err}")
         conn.rollback()
         return False
@@ -403,7 +424,7 @@ def determine_genre(title, content):
 def show_statistics(db_config):
     """Show current database statistics"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = storage.connect(db_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("SELECT COUNT(*) as total FROM documents")
@@ -449,12 +470,7 @@ if __name__ == "__main__":
     check_folder_contents()
     
     # Show current statistics
-    db_config = {
-        "host": "localhost",
-        "user": "root",
-        "password": "", 
-        "database": "mycorpus"
-    }
+    db_config = storage.DB_CONFIG
     
     show_statistics(db_config)
     
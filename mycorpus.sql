@@ -2,3 +2,17 @@
 
 SELECT COUNT(*) as count FROM documents;
 SELECT * FROM documents LIMIT 1;
+
+-- Near-duplicate detection (near_duplicates.py). A NULL signature marks a
+-- document too short to sign so the backfill does not re-read it.
+CREATE TABLE IF NOT EXISTS document_signatures (
+    doc_id INT PRIMARY KEY,
+    signature VARBINARY(512) NULL
+);
+
+CREATE TABLE IF NOT EXISTS document_lsh_bands (
+    band SMALLINT NOT NULL,
+    bucket_hash BIGINT NOT NULL,
+    doc_id INT NOT NULL,
+    PRIMARY KEY (band, bucket_hash, doc_id)
+);
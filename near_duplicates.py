@@ -0,0 +1,279 @@
+# near_duplicates.py - MinHash/LSH near-duplicate detection for corpus documents
+import hashlib
+import random
+import re
+import struct
+import zlib
+
+# MinHash / LSH parameters. 16 bands of 8 rows put the LSH candidate
+# threshold at roughly (1/16) ** (1/8) ~= 0.71 Jaccard similarity.
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.8
+BACKFILL_BATCH_SIZE = 100
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}I"
+
+# Fixed seed so signatures stored in the database stay comparable across runs
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def get_shingles(text):
+    """Return the set of hashed word shingles of a text (empty if it has fewer than SHINGLE_SIZE words)"""
+    words = re.findall(r"\w+", text.lower())
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_signature(text):
+    """Compute the MinHash signature of a text as a tuple of 32-bit ints
+
+    Returns None for texts too short to shingle, such as scanned PDFs with no
+    extractable text; those are neither checked nor stored.
+    """
+    shingles = get_shingles(text)
+    if not shingles:
+        return None
+    return tuple(
+        min(((a * shingle + b) % _MERSENNE_PRIME) & _MAX_HASH for shingle in shingles)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def pack_signature(signature):
+    """Pack a signature into bytes for storage"""
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    """Unpack a signature stored with pack_signature"""
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def estimate_similarity(signature_a, signature_b):
+    """Estimate the Jaccard similarity of two documents from their signatures"""
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / NUM_PERMUTATIONS
+
+
+def get_bands(signature):
+    """Yield (band, rows) pairs splitting a signature into its LSH bands"""
+    for band in range(LSH_BANDS):
+        yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+
+def get_band_hashes(signature):
+    """Yield (band, bucket_hash) pairs of a signature as signed 64-bit ints for the database"""
+    for band, rows in get_bands(signature):
+        digest = hashlib.blake2b(struct.pack(f"<{LSH_ROWS}I", *rows), digest_size=8).digest()
+        yield band, int.from_bytes(digest, "little", signed=True)
+
+
+class LSHIndex:
+    """In-memory LSH index over MinHash signatures"""
+
+    def __init__(self):
+        self.signatures = {}
+        self.buckets = [{} for _ in range(LSH_BANDS)]
+
+    def add(self, doc_id, signature):
+        """Add a document signature to the index"""
+        self.signatures[doc_id] = signature
+        for band, key in get_bands(signature):
+            self.buckets[band].setdefault(key, set()).add(doc_id)
+
+    def candidates(self, signature):
+        """Return the ids of documents sharing at least one band with a signature"""
+        found = set()
+        for band, key in get_bands(signature):
+            found.update(self.buckets[band].get(key, ()))
+        return found
+
+
+def ensure_signature_tables(cursor):
+    """Create the signature and LSH band tables if they do not exist yet
+
+    For the batch job and file inserter only; request handlers rely on the
+    tables from mycorpus.sql (MySQL) or storage.SQLITE_SCHEMA (SQLite).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_signatures (
+            doc_id INT PRIMARY KEY,
+            signature BLOB NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS document_lsh_bands (
+            band SMALLINT NOT NULL,
+            bucket_hash BIGINT NOT NULL,
+            doc_id INT NOT NULL,
+            PRIMARY KEY (band, bucket_hash, doc_id)
+        )
+    """)
+
+
+def store_signature(cursor, doc_id, signature):
+    """Store the signature and LSH band keys of a document (caller commits)
+
+    A None signature is stored as NULL to mark a document too short to sign,
+    so the backfill does not read it again.
+    """
+    cursor.execute(
+        "INSERT INTO document_signatures (doc_id, signature) VALUES (%s, %s)",
+        (doc_id, pack_signature(signature) if signature is not None else None)
+    )
+    if signature is None:
+        return
+    for band, bucket_hash in get_band_hashes(signature):
+        cursor.execute(
+            "INSERT INTO document_lsh_bands (band, bucket_hash, doc_id) VALUES (%s, %s, %s)",
+            (band, bucket_hash, doc_id)
+        )
+
+
+def find_duplicate(cursor, signature, threshold=DUPLICATE_THRESHOLD):
+    """Return (doc_id, similarity) of the closest stored near-duplicate, or None
+
+    Candidates are looked up through the indexed document_lsh_bands table, so
+    documents stored by any process are seen and only LSH candidates are read.
+    """
+    bands = list(get_band_hashes(signature))
+    conditions = " OR ".join("(band = %s AND bucket_hash = %s)" for _ in bands)
+    cursor.execute(
+        f"""
+        SELECT doc_id, signature FROM document_signatures
+        WHERE doc_id IN (SELECT doc_id FROM document_lsh_bands WHERE {conditions})
+        """,
+        tuple(value for pair in bands for value in pair)
+    )
+
+    best = None
+    for doc_id, data in cursor.fetchall():
+        similarity = estimate_similarity(signature, unpack_signature(data))
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (doc_id, similarity)
+    return best
+
+
+def backfill_signatures(conn, batch_size=BACKFILL_BATCH_SIZE):
+    """Sign documents that have no stored signature yet, a batch at a time
+
+    Meant for the batch job and file inserter, never for request handlers.
+    Returns the number of documents processed.
+    """
+    cursor = conn.cursor()
+    try:
+        ensure_signature_tables(cursor)
+        signed = 0
+        last_id = 0
+        while True:
+            # Page by id so each batch is read fully before its signatures are written
+            cursor.execute("""
+                SELECT d.id, d.text FROM documents d
+                LEFT JOIN document_signatures s ON s.doc_id = d.id
+                WHERE s.doc_id IS NULL AND d.id > %s
+                ORDER BY d.id
+                LIMIT %s
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            for doc_id, text in rows:
+                store_signature(cursor, doc_id, compute_signature(text or ""))
+                signed += 1
+            conn.commit()
+            last_id = rows[-1][0]
+
+        return signed
+    finally:
+        cursor.close()
+
+
+def load_signature_index(conn, batch_size=BACKFILL_BATCH_SIZE):
+    """Build an in-memory LSH index from the stored signatures"""
+    cursor = conn.cursor()
+    try:
+        ensure_signature_tables(cursor)
+
+        index = LSHIndex()
+        cursor.execute("SELECT doc_id, signature FROM document_signatures WHERE signature IS NOT NULL")
+        while rows := cursor.fetchmany(batch_size):
+            for doc_id, data in rows:
+                index.add(doc_id, unpack_signature(data))
+
+        return index
+    finally:
+        cursor.close()
+
+
+def find_duplicate_clusters(index, threshold=DUPLICATE_THRESHOLD):
+    """Group indexed documents into clusters of near-duplicates"""
+    parent = {doc_id: doc_id for doc_id in index.signatures}
+
+    def find(doc_id):
+        while parent[doc_id] != doc_id:
+            parent[doc_id] = parent[parent[doc_id]]
+            doc_id = parent[doc_id]
+        return doc_id
+
+    for doc_id, signature in index.signatures.items():
+        for other_id in index.candidates(signature):
+            if other_id == doc_id or find(doc_id) == find(other_id):
+                continue
+            if estimate_similarity(signature, index.signatures[other_id]) >= threshold:
+                parent[find(other_id)] = find(doc_id)
+
+    clusters = {}
+    for doc_id in index.signatures:
+        clusters.setdefault(find(doc_id), []).append(doc_id)
+    return [sorted(cluster) for cluster in clusters.values() if len(cluster) > 1]
+
+
+if __name__ == "__main__":
+    import storage
+
+    print("=" * 60)
+    print("ISIZULU CORPUS NEAR-DUPLICATE FINDER")
+    print("=" * 60)
+
+    try:
+        conn = storage.connect()
+        print("✅ Connected to the database")
+
+        signed = backfill_signatures(conn)
+        print(f"✍️  Signed {signed} new document(s)")
+
+        index = load_signature_index(conn)
+        print(f"🔍 Indexed {len(index.signatures)} document(s)")
+
+        clusters = find_duplicate_clusters(index)
+        if not clusters:
+            print("✅ No near-duplicate documents found")
+        else:
+            cursor = conn.cursor()
+            print(f"⚠️  Found {len(clusters)} near-duplicate cluster(s):")
+            for i, cluster in enumerate(clusters, 1):
+                print(f"\n  Cluster {i}:")
+                for doc_id in cluster:
+                    cursor.execute("SELECT title FROM documents WHERE id = %s", (doc_id,))
+                    row = cursor.fetchone()
+                    print(f"     {doc_id}: {row[0] if row else '?'}")
+            cursor.close()
+
+    except storage.Error as err:
+        print(f"❌ Database error: {err}")
+    finally:
+        if 'conn' in locals() and conn.is_connected():
+            conn.close()
+            print("🔌 Database connection closed")
@@ -1,5 +1,9 @@
-// Current search keyword
+// Current search keyword and its contexts
 let currentKeyword = '';
+let currentContexts = [];
+
+// Most contexts the backend returns per keyword
+const CONTEXT_PAGE_SIZE = 200;
 
 // DOM elements
 const pages = document.querySelectorAll('.page');
@@ -89,10 +93,11 @@ async function handleSearch(e) {
     
     if (currentKeyword) {
         try {
-            const res = await fetch(`${API_URL}/search/`, {
+            // Frequency and contexts come back together from one corpus pass
+            const res = await fetch(`${API_URL}/search/batch/`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ keyword: currentKeyword })
+                body: JSON.stringify({ keywords: [currentKeyword], page_size: CONTEXT_PAGE_SIZE })
             });
             
             if (!res.ok) {
@@ -108,8 +113,10 @@ async function handleSearch(e) {
                 return;
             }
 
-            frequencyCount.textContent = data.frequency;
-            currentKeywordEl.textContent = data.keyword;
+            const result = data.results[0];
+            frequencyCount.textContent = result.frequency;
+            currentKeywordEl.textContent = result.keyword;
+            currentContexts = result.contexts;
 
             await updateTopWords();
             showPage('frequency');
@@ -258,29 +265,12 @@ async function updateTopWords() {
     }
 }
 
-// Context display (now fetched from backend)
+// Context display (fetched with the search results)
 async function updateContextPage() {
     contextKeywordEl.textContent = currentKeyword;
 
     try {
-        const res = await fetch(`${API_URL}/context/`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ keyword: currentKeyword })
-        });
-        
-        if (!res.ok) {
-            throw new Error(`HTTP error! status: ${res.status}`);
-        }
-        
-        const contexts = await res.json();
-        
-        // Check for error response
-        if (contexts.error) {
-            console.error("Context error:", contexts.error);
-            contextExamples.innerHTML = `<p>Error loading context: ${contexts.error}</p>`;
-            return;
-        }
+        const contexts = currentContexts;
 
         if (contexts.length === 0) {
             contextExamples.innerHTML = '<p>Alukho ulwazi mayelana naleli gama esiqoqweni.</p>';
@@ -1,21 +1,20 @@
 # server.py - Updated with document viewing functionality
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import mysql.connector
+from typing import List, Optional
+from collections import Counter
+import near_duplicates
+import storage
 import os
 import uuid
 import docx
 import PyPDF2
 import io
 
-# Configure your DB connection
-db_config = {
-    "host": "localhost",
-    "user": "root",        # change this
-    "password": "",        # change this
-    "database": "mycorpus"   # change this
-}
+# Configure your DB connection in storage.py (MySQL or SQLite)
+db_config = storage.DB_CONFIG
 
 app = FastAPI()
 
@@ -30,14 +29,35 @@ app.add_middleware(
 
 # Request models
 class SearchRequest(BaseModel):
-    keyword: str
+    keyword: Optional[str] = None
+    keywords: List[str] = []
+    page: int = 1
+    page_size: int = 20
+
+# Collect the lowercased, de-duplicated keywords of a request
+def get_request_keywords(request: SearchRequest):
+    keywords = []
+    for keyword in ([request.keyword] if request.keyword else []) + request.keywords:
+        keyword = keyword.strip().lower()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    if not keywords:
+        raise HTTPException(status_code=400, detail="No keyword given")
+    return keywords
+
+# Get the one keyword of a request to a single-keyword endpoint
+def get_request_keyword(request: SearchRequest):
+    keywords = get_request_keywords(request)
+    if len(keywords) > 1:
+        raise HTTPException(status_code=400, detail="Several keywords given, use /search/batch/ instead")
+    return keywords[0]
 
 # Helper function to get database connection
 def get_db_connection():
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = storage.connect(db_config)
         return conn
-    except mysql.connector.Error as err:
+    except storage.Error as err:
         raise HTTPException(status_code=500, detail=f"Database connection error: {err}")
 
 # Endpoint: Get all documents
@@ -79,13 +99,13 @@ def get_document(doc_id: int):
 # Endpoint: Search keyword frequency
 @app.post("/search/")
 def search_keyword(request: SearchRequest):
-    keyword = request.keyword.lower()
+    keyword = get_request_keyword(request)
     conn = None
     
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT text FROM documents")
+        storage.select_documents(cursor, "text", [keyword])
         texts = cursor.fetchall()
         
         frequency = sum(text["text"].lower().split().count(keyword) for text in texts)
@@ -99,13 +119,13 @@ def search_keyword(request: SearchRequest):
 # Endpoint: Get keyword context
 @app.post("/context/")
 def get_context(request: SearchRequest):
-    keyword = request.keyword.lower()
+    keyword = get_request_keyword(request)
     conn = None
     
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, title, text, source FROM documents")
+        storage.select_documents(cursor, "id, title, text, source", [keyword])
         docs = cursor.fetchall()
         
         contexts = []
@@ -132,6 +152,60 @@ def get_context(request: SearchRequest):
         if conn and conn.is_connected():
             conn.close()
 
+# Endpoint: Frequencies and paged contexts for several keywords in one corpus pass
+@app.post("/search/batch/")
+def search_keywords_batch(request: SearchRequest):
+    keywords = get_request_keywords(request)
+    page = max(1, request.page)
+    page_size = max(1, min(request.page_size, 200))
+    first = (page - 1) * page_size
+    last = first + page_size
+    conn = None
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        storage.select_documents(cursor, "id, title, text, source", keywords)
+
+        results = {keyword: {"keyword": keyword, "frequency": 0, "total_contexts": 0, "contexts": []}
+                   for keyword in keywords}
+
+        # Read each document once and answer every keyword from it
+        for doc in cursor:
+            text = doc["text"]
+            lower_text = text.lower()
+            word_counts = Counter(lower_text.split())
+
+            for keyword in keywords:
+                result = results[keyword]
+                result["frequency"] += word_counts[keyword]
+
+                pos = 0
+                while (pos := lower_text.find(keyword, pos)) != -1:
+                    # Only build the snippets that fall on the requested page
+                    if first <= result["total_contexts"] < last:
+                        start = max(0, pos - 50)
+                        end = min(len(text), pos + len(keyword) + 50)
+                        result["contexts"].append({
+                            "doc_id": doc["id"],
+                            "title": doc["title"],
+                            "source": doc["source"],
+                            "context": text[start:end].replace("\n", " ")
+                        })
+                    result["total_contexts"] += 1
+                    pos += len(keyword)
+
+        return {
+            "page": page,
+            "page_size": page_size,
+            "results": [results[keyword] for keyword in keywords]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
 # Endpoint: Upload document
 @app.post("/upload/")
 async def upload_document(
@@ -168,17 +242,27 @@ async def upload_document(
         if cursor.fetchone():
             raise HTTPException(status_code=400, detail="Document with this title already exists")
         
+        # Check for a near-duplicate of an existing document (texts too short to sign are not checked)
+        signature = await run_in_threadpool(near_duplicates.compute_signature, content)
+        duplicate = signature and near_duplicates.find_duplicate(cursor, signature)
+        if duplicate:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Document is a near-duplicate of document {duplicate[0]} ({duplicate[1]:.0%} similar)"
+            )
+        
         # Insert new document
         insert_query = """
         INSERT INTO documents (title, text, genre, source)
         VALUES (%s, %s, %s, %s)
         """
         cursor.execute(insert_query, (title, content, genre, source))
-        conn.commit()
         
         # Get the ID of the inserted document
-        cursor.execute("SELECT LAST_INSERT_ID()")
-        doc_id = cursor.fetchone()[0]
+        doc_id = cursor.lastrowid
+        
+        near_duplicates.store_signature(cursor, doc_id, signature)
+        conn.commit()
         
         return {
             "id": doc_id,
@@ -186,6 +270,10 @@ async def upload_document(
             "message": "Document uploaded successfully"
         }
         
+    except HTTPException:
+        if conn:
+            conn.rollback()
+        raise
     except Exception as e:
         if conn:
             conn.rollback()
@@ -0,0 +1,227 @@
+# storage.py - Database backends (MySQL or embedded SQLite) for the corpus
+import contextlib
+import os
+import re
+import sqlite3
+
+try:
+    import mysql.connector
+except ImportError:  # only needed for the mysql backend
+    mysql = None
+
+# Configure your DB connection. Set CORPUS_DB_BACKEND=sqlite to use a local
+# SQLite file (CORPUS_SQLITE_PATH) instead of a MySQL server.
+DB_CONFIG = {
+    "backend": os.environ.get("CORPUS_DB_BACKEND", "mysql"),
+    "path": os.environ.get("CORPUS_SQLITE_PATH", "mycorpus.db"),
+    "host": "localhost",
+    "user": "root",        # change this
+    "password": "",        # change this
+    "database": "mycorpus"   # change this
+}
+
+# Exceptions raised by either backend
+Error = (sqlite3.Error,) + ((mysql.connector.Error,) if mysql else ())
+
+# The trigram tokenizer needs SQLite 3.34+; older libraries skip the FTS
+# index and select_documents falls back to reading every document
+SQLITE_HAS_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    genre TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_documents_title ON documents (title);
+CREATE TABLE IF NOT EXISTS document_signatures (
+    doc_id INTEGER PRIMARY KEY,
+    signature BLOB
+);
+CREATE TABLE IF NOT EXISTS document_lsh_bands (
+    band INTEGER NOT NULL,
+    bucket_hash INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket_hash, doc_id)
+);
+"""
+
+# Trigram FTS5 index so keyword and substring searches skip documents
+# that cannot contain the keyword
+SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 (
+    text, content='documents', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# Quoted SQL literals are matched first so %s inside them is left alone
+_PLACEHOLDER_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|%%|%s")
+
+
+def _convert_placeholder(match):
+    token = match.group(0)
+    if token == "%s":
+        return "?"
+    # mysql.connector unescapes %% everywhere, literals included
+    return token.replace("%%", "%")
+
+
+class SQLiteCursor:
+    """sqlite3 cursor accepting the %s placeholders and dictionary rows used with MySQL"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, query, params=None):
+        # Like mysql.connector, only rewrite %s and %% when parameters are passed
+        if params is None:
+            self._cursor.execute(query)
+        else:
+            self._cursor.execute(_PLACEHOLDER_PATTERN.sub(_convert_placeholder, query), params)
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._row(row)
+
+    def select_documents(self, columns, keywords=()):
+        """Select documents, narrowed by the trigram index when every keyword is long enough"""
+        query = f"SELECT {columns} FROM documents"
+        if SQLITE_HAS_TRIGRAM and keywords and all(len(keyword) >= 3 for keyword in keywords):
+            match = " OR ".join('"' + keyword.replace('"', '""') + '"' for keyword in keywords)
+            self.execute(f"{query} WHERE id IN (SELECT rowid FROM documents_fts WHERE documents_fts MATCH %s)", (match,))
+        else:
+            self.execute(query)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection exposing the parts of the mysql.connector API the corpus uses"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        if SQLITE_HAS_TRIGRAM:
+            self._conn.executescript(SQLITE_FTS_SCHEMA)
+        self._connected = True
+        self._bulk_loading = False
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        # During a bulk load each commit only closes the document's savepoint
+        if self._bulk_loading:
+            self._conn.execute("RELEASE SAVEPOINT bulk_document")
+            self._conn.execute("SAVEPOINT bulk_document")
+        else:
+            self._conn.commit()
+
+    def rollback(self):
+        if self._bulk_loading:
+            self._conn.execute("ROLLBACK TO SAVEPOINT bulk_document")
+        else:
+            self._conn.rollback()
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        """Load a batch of documents in one transaction with relaxed durability
+
+        commit() and rollback() inside the block act on a per-document
+        savepoint, so a failed document is undone without losing the batch.
+        The write lock is held for the whole block, so callers should keep
+        batches small and do slow work such as file parsing beforehand.
+        """
+        self._conn.commit()
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("PRAGMA cache_size=-65536")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.execute("BEGIN")
+        self._conn.execute("SAVEPOINT bulk_document")
+        self._bulk_loading = True
+        try:
+            yield
+            self._bulk_loading = False
+            self._conn.execute("RELEASE SAVEPOINT bulk_document")
+            self._conn.commit()
+        except BaseException:
+            self._bulk_loading = False
+            self._conn.rollback()
+            raise
+        finally:
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA optimize")
+
+    def is_connected(self):
+        return self._connected
+
+    def close(self):
+        self._conn.close()
+        self._connected = False
+
+
+def connect(config=DB_CONFIG):
+    """Open a connection to the configured backend"""
+    backend = config.get("backend", "mysql")
+    if backend == "sqlite":
+        return SQLiteConnection(config["path"])
+    if backend == "mysql":
+        if mysql is None:
+            raise RuntimeError("mysql-connector-python is required for the mysql backend")
+        mysql_config = {key: value for key, value in config.items() if key not in ("backend", "path")}
+        return mysql.connector.connect(**mysql_config)
+    raise ValueError(f"Unknown database backend: {backend}")
+
+
+def select_documents(cursor, columns, keywords=()):
+    """Select documents that may contain any of the keywords (all documents if none given)
+
+    On SQLite the trigram index narrows the scan to documents containing a
+    keyword. Keywords shorter than three characters cannot use the index, so
+    they, and the MySQL backend, fall back to reading every document.
+    """
+    if hasattr(cursor, "select_documents"):
+        cursor.select_documents(columns, keywords)
+    else:
+        cursor.execute(f"SELECT {columns} FROM documents")
+
+
+def bulk_load(conn):
+    """Context manager for loading many documents; a no-op on MySQL"""
+    if hasattr(conn, "bulk_load"):
+        return conn.bulk_load()
+    return contextlib.nullcontext()
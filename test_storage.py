@@ -0,0 +1,183 @@
+# test_storage.py - Tests for the SQLite backend and near-duplicate detection
+import sqlite3
+
+import pytest
+
+import near_duplicates
+import storage
+
+INSERT_QUERY = "INSERT INTO documents (title, text, genre, source) VALUES (%s, %s, %s, %s)"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "corpus.db")
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = storage.connect({"backend": "sqlite", "path": db_path})
+    yield conn
+    conn.close()
+
+
+def insert(conn, title, text):
+    cursor = conn.cursor()
+    cursor.execute(INSERT_QUERY, (title, text, "news", "test"))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def titles(cursor):
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def test_execute_rewrites_placeholders_outside_literals(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT '%s', '100%%', 'it''s %s', %s, 'a%%b'", (5,))
+    assert cursor.fetchone() == ("%s", "100%", "it's %s", 5, "a%b")
+
+
+def test_execute_leaves_query_alone_without_params(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT '100%%'")
+    assert cursor.fetchone() == ("100%%",)
+
+
+def test_dictionary_cursor_returns_dicts(conn):
+    doc_id = insert(conn, "Izindaba", "Sawubona baba")
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id, title FROM documents WHERE id = %s", (doc_id,))
+    assert cursor.fetchone() == {"id": doc_id, "title": "Izindaba"}
+
+
+@pytest.mark.skipif(not storage.SQLITE_HAS_TRIGRAM, reason="needs SQLite 3.34+")
+def test_select_documents_narrows_with_trigram_index(conn):
+    insert(conn, "a", "Sawubona baba, unjani?")
+    insert(conn, "b", "Iqembu lidlale kahle")
+    cursor = conn.cursor()
+
+    storage.select_documents(cursor, "title", ["UNJANI"])
+    assert titles(cursor) == ["a"]
+
+    storage.select_documents(cursor, "title", ["unjani", "iqembu"])
+    assert titles(cursor) == ["a", "b"]
+
+    storage.select_documents(cursor, "title", ['no"match'])
+    assert titles(cursor) == []
+
+
+def test_select_documents_scans_everything_for_short_keywords(conn):
+    insert(conn, "a", "Sawubona baba")
+    insert(conn, "b", "Iqembu lidlale kahle")
+    cursor = conn.cursor()
+
+    storage.select_documents(cursor, "title", ["ba"])
+    assert titles(cursor) == ["a", "b"]
+
+
+def test_select_documents_without_trigram_support(db_path, monkeypatch):
+    monkeypatch.setattr(storage, "SQLITE_HAS_TRIGRAM", False)
+    conn = storage.connect({"backend": "sqlite", "path": db_path})
+    try:
+        insert(conn, "a", "Sawubona baba")
+        insert(conn, "b", "Iqembu lidlale kahle")
+        cursor = conn.cursor()
+
+        storage.select_documents(cursor, "title", ["sawubona"])
+        assert titles(cursor) == ["a", "b"]
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = %s", ("documents_fts",))
+        assert cursor.fetchone() is None
+    finally:
+        conn.close()
+
+
+def test_mysql_fallbacks_do_not_need_sqlite_methods():
+    class Cursor:
+        def execute(self, query, params=None):
+            self.query = query
+
+    cursor = Cursor()
+    storage.select_documents(cursor, "text", ["keyword"])
+    assert cursor.query == "SELECT text FROM documents"
+
+    with storage.bulk_load(object()):
+        pass
+
+
+def test_bulk_load_rolls_back_single_documents(conn, db_path):
+    cursor = conn.cursor()
+    other = sqlite3.connect(db_path)
+    try:
+        with storage.bulk_load(conn):
+            cursor.execute(INSERT_QUERY, ("a", "one", "news", "test"))
+            conn.commit()
+            cursor.execute(INSERT_QUERY, ("b", "two", "news", "test"))
+            conn.rollback()
+            cursor.execute(INSERT_QUERY, ("c", "three", "news", "test"))
+            conn.commit()
+            assert other.execute("SELECT COUNT(*) FROM documents").fetchone() == (0,)
+
+        assert sorted(row[0] for row in other.execute("SELECT title FROM documents")) == ["a", "c"]
+    finally:
+        other.close()
+
+
+def test_bulk_load_discards_batch_on_error(conn):
+    cursor = conn.cursor()
+    with pytest.raises(KeyError):
+        with storage.bulk_load(conn):
+            cursor.execute(INSERT_QUERY, ("a", "one", "news", "test"))
+            conn.commit()
+            raise KeyError
+
+    insert(conn, "b", "two")
+    cursor.execute("SELECT title FROM documents")
+    assert titles(cursor) == ["b"]
+
+
+ARTICLE = " ".join(f"igama{i % 97} elinye{i % 31}" for i in range(400))
+
+
+def test_compute_signature_skips_short_texts():
+    assert near_duplicates.compute_signature("") is None
+    assert near_duplicates.compute_signature("   ") is None
+    assert near_duplicates.compute_signature("sawubona baba") is None
+
+
+def test_signatures_estimate_similarity():
+    signature = near_duplicates.compute_signature(ARTICLE)
+    edited = near_duplicates.compute_signature(ARTICLE.replace("igama5 ", "ushintshile ", 1))
+    other = near_duplicates.compute_signature("Iqembu lidlale kahle namhlanje ezinkundleni zebhola eThekwini")
+
+    assert near_duplicates.estimate_similarity(signature, signature) == 1.0
+    assert near_duplicates.estimate_similarity(signature, edited) >= near_duplicates.DUPLICATE_THRESHOLD
+    assert near_duplicates.estimate_similarity(signature, other) < near_duplicates.DUPLICATE_THRESHOLD
+    assert near_duplicates.unpack_signature(near_duplicates.pack_signature(signature)) == signature
+
+
+def test_find_duplicate_uses_stored_bands(conn):
+    original_id = insert(conn, "original", ARTICLE)
+    insert(conn, "empty", "")
+    assert near_duplicates.backfill_signatures(conn) == 2
+    assert near_duplicates.backfill_signatures(conn) == 0
+
+    cursor = conn.cursor()
+    edited = near_duplicates.compute_signature(ARTICLE.replace("igama5 ", "ushintshile ", 1))
+    doc_id, similarity = near_duplicates.find_duplicate(cursor, edited)
+    assert doc_id == original_id
+    assert similarity >= near_duplicates.DUPLICATE_THRESHOLD
+
+    unrelated = near_duplicates.compute_signature("Iqembu lidlale kahle namhlanje ezinkundleni zebhola eThekwini")
+    assert near_duplicates.find_duplicate(cursor, unrelated) is None
+
+
+def test_find_duplicate_clusters(conn):
+    first = insert(conn, "first", ARTICLE)
+    second = insert(conn, "second", ARTICLE.replace("igama5 ", "ushintshile ", 1))
+    insert(conn, "other", "Iqembu lidlale kahle namhlanje ezinkundleni zebhola eThekwini")
+    near_duplicates.backfill_signatures(conn)
+
+    index = near_duplicates.load_signature_index(conn)
+    assert near_duplicates.find_duplicate_clusters(index) == [[first, second]]